@@ -5,6 +5,7 @@ from baboossh.exceptions import *
 from baboossh.utils import Unique
 from paramiko.py3compat import u
 import socket
+import threading
 
 class Connection(metaclass=Unique):
     """A :class:`User` and :class:`Creds` to authenticate on an :class:`Endpoint`
@@ -26,6 +27,8 @@ class Connection(metaclass=Unique):
             closure.
     """
 
+    #Serializes gateways opening when probing from several threads
+    __gateway_lock = threading.RLock()
 
     def __init__(self, endpoint, user, cred):
         """Create the object and fetches info from database if it has been saved.
@@ -360,39 +363,91 @@ class Connection(metaclass=Unique):
             return False
         return True
 
-    def open_transport(self, gateway="auto"):
+    def open_socket(self, gateway="auto"):
+        """Open a raw socket to the `Connection` 's :class:`Endpoint`
+
+        Args:
+            gateway (`Connection`): the gateway to go through, `None` to
+                connect directly or `"auto"` to find one
+
+        Returns:
+            A (socket or :class:`paramiko.Channel`, gateway) tuple
+        """
+
         #TODO check verbosity levels
         sock = None
         if gateway == "auto":
             gateway = Connection.find_one(gateway_to=self.endpoint)
         if gateway is not None:
-            if not gateway.open(verbose=False):
+            with Connection.__gateway_lock:
+                gateway_open = gateway.open(verbose=False)
+            if not gateway_open:
                 raise ConnectionClosedError("Could not open gateway "+str(gateway))
             sock = gateway.transport.open_channel('direct-tcpip', (self.endpoint.ip, self.endpoint.port), ('', 0));
         else:
             sock = socket.socket(socket.AF_INET,socket.SOCK_STREAM)
             sock.settimeout(3)
             sock.connect((self.endpoint.ip,self.endpoint.port))
+        return (sock, gateway)
 
+    def open_transport(self, gateway="auto"):
+        sock, gateway = self.open_socket(gateway=gateway)
         transport = paramiko.Transport(sock)
         transport.start_client()
         return (sock,transport, gateway)
 
+    @staticmethod
+    def __read_banner(sock):
+        """Check that a SSH server sends its identification string on a socket
+
+        The server may send other lines before the `SSH-` one, so several lines
+        are read, up to a reasonable amount of data.
+
+        Args:
+            sock (socket or :class:`paramiko.Channel`): the open socket
+
+        Returns:
+            `True` if the SSH identification string was received
+        """
+
+        sock.settimeout(3)
+        data = b""
+        while len(data) < 8192:
+            chunk = sock.recv(1024)
+            if not chunk:
+                return False
+            data = data + chunk
+            for line in data.split(b"\n")[:-1]:
+                if line.startswith(b"SSH-"):
+                    return True
+        return False
+
     def probe(self, gateway="auto", verbose=True):
+        """Check whether the :class:`Endpoint` can be reached
+
+        Only the server identification string is read: no key exchange is
+        performed, as it isn't needed to know a SSH server is listening.
+        """
+
         if gateway is not None:
             if gateway == "auto":
                 gateway = Connection.find_one(gateway_to=self.endpoint)
         try:
-            sock, transport, gateway = self.open_transport(gateway=gateway);
-        except (TimeoutError, OSError, ConnectionRefusedError) as err:
+            sock, gateway = self.open_socket(gateway=gateway)
+        except (TimeoutError, OSError, ConnectionRefusedError, paramiko.SSHException) as err:
+            return False
+        try:
+            is_ssh = self.__read_banner(sock)
+        except (TimeoutError, OSError) as err:
+            is_ssh = False
+        sock.close()
+        if not is_ssh:
             return False
         self.endpoint.reachable = True
         new_distance = 1 if gateway is None else gateway.endpoint.distance + 1
         if self.endpoint.distance is None or self.endpoint.distance > new_distance:
             self.endpoint.distance = new_distance
         self.endpoint.save()
-        transport.close()
-        sock.close()
         return True
 
     def open(self, verbose=False, target=False):
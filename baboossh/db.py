@@ -59,7 +59,7 @@ class Db():
             scope INTEGER NOT NULL,
             host INTEGER,
             ip TEXT NOT NULL,
-            port TEXT NOT NULL,
+            port INTEGER NOT NULL,
             reachable INTEGER,
             distance INTEGER,
             found INTEGER,
@@ -105,10 +105,30 @@ class Db():
             FOREIGN KEY(endpoint) REFERENCES endpoints(id),
             UNIQUE(name, endpoint)
             )''')
-            
+        cls.__create_indexes(connection)
         connection.commit()
         connection.close()
 
+    @classmethod
+    def __create_indexes(cls, connection):
+        """Create the indexes used by the lookups if they don't exist yet
+
+        This is also run when connecting so that workspaces built by previous
+        versions get them.
+
+        Args:
+            connection (:class:`sqlite3.Connection`): the workspace database connection
+        """
+
+        try:
+            connection.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_endpoints_ip_port ON endpoints(ip, port)')
+        except sqlite3.IntegrityError:
+            #Duplicated endpoints in an old workspace, keep working without the index
+            pass
+        connection.execute('CREATE INDEX IF NOT EXISTS idx_endpoints_scope ON endpoints(scope)')
+        connection.execute('CREATE INDEX IF NOT EXISTS idx_endpoints_found ON endpoints(found)')
+        connection.commit()
+
     @classmethod
     def connect(cls, workspace):
         """Open the connection to the database for a :class:`Workspace`
@@ -130,14 +150,37 @@ class Db():
         if current_thread_name != main_thread_name:
             if current_thread_name in cls.__threadsConn.keys():
                 return
-            cls.__threadsConn[current_thread_name] = sqlite3.connect(db_path)
+            cls.__threadsConn[current_thread_name] = cls.__open(db_path)
             return
         if cls.__conn is not None:
             cls.__conn.close()
         cls.__workspace = workspace
         if not os.path.exists(db_path):
             raise ValueError("Workspace database not found, the workspace must be corrupted !")
-        cls.__conn = sqlite3.connect(db_path)
+        cls.__conn = cls.__open(db_path)
+        cls.__create_indexes(cls.__conn)
+
+    @classmethod
+    def __open(cls, db_path):
+        """Open a sqlite connection tuned for the workspace usage
+
+        The database is switched to WAL journaling so that each commit doesn't
+        sync the whole database, and readers in other threads (tunnels) aren't
+        blocked by writers.
+
+        Args:
+            db_path (str): the path of the database file
+
+        Returns:
+            An open :class:`sqlite3.Connection`
+        """
+
+        connection = sqlite3.connect(db_path)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('PRAGMA temp_store=MEMORY')
+        connection.execute('PRAGMA cache_size=-20000')
+        return connection
 
     @classmethod
     def close(cls):
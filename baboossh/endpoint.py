@@ -1,4 +1,4 @@
-import ipaddress
+import socket
 import hashlib
 import sqlite3
 from baboossh import Db
@@ -6,6 +6,45 @@ from baboossh import Host
 from baboossh.utils import Unique
 from baboossh.tag import Tag
 
+#Queries are kept as constants so that sqlite's statement cache is hit with
+#the same strings instead of rebuilding them on every call.
+#The found Endpoint's address is joined so that it can be resolved lazily
+_SELECT_ENDPOINTS = '''SELECT e.id, e.ip, e.port, e.host, e.reachable, e.distance, e.scope, e.found, f.ip, f.port
+    FROM endpoints e LEFT JOIN endpoints f ON e.found = f.id'''
+_SELECT_ENDPOINT_BY_ID = _SELECT_ENDPOINTS+' WHERE e.id=?'
+_SELECT_ENDPOINT_BY_IP_PORT = _SELECT_ENDPOINTS+' WHERE e.ip=? AND e.port=?'
+_COUNT_ENDPOINTS = 'SELECT COUNT(*) FROM endpoints e'
+_UPDATE_ENDPOINT = '''UPDATE endpoints
+    SET
+        ip = ?,
+        port = ?,
+        host = ?,
+        reachable = ?,
+        distance = ?,
+        scope = ?,
+        found = ?
+    WHERE id = ?'''
+_INSERT_ENDPOINT = '''INSERT INTO endpoints(ip, port, host, reachable, distance, scope, found)
+    VALUES (?, ?, ?, ?, ?, ?, ?)'''
+
+def _validate_ip(ip):
+    """Check that a string is an IPv4 or IPv6 address
+
+    Args:
+        ip (str): the string to check
+
+    Raises:
+        ValueError: if `ip` isn't an IP address
+    """
+
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, ip)
+        except (OSError, TypeError):
+            continue
+        return
+    raise ValueError(repr(ip)+" does not appear to be an IPv4 or IPv6 address")
+
 class Endpoint(metaclass=Unique):
     """A SSH endpoint
 
@@ -14,7 +53,7 @@ class Endpoint(metaclass=Unique):
 
     Attributes:
         ip (str): The IP address of the Endpoint
-        port (str): The port number of the Endpoint
+        port (int): The port number of the Endpoint
         id (int): The endpoint id
         host (:class:`.Host`): The Endpoint's :class:`.Host`
         scope (bool): Whether the Endpoint is in scope or not
@@ -25,11 +64,18 @@ class Endpoint(metaclass=Unique):
 
     search_fields = ['ip', 'port']
 
+    #Filtered queries, formatted once per set of criteria
+    __queries = {}
+    __search_queries = {}
+
     def __init__(self, ip, port):
         #check if ip is actually an IP
-        ipaddress.ip_address(ip)
+        _validate_ip(ip)
         if not isinstance(port, int) and not port.isdigit():
             raise ValueError("The port is not a positive integer")
+        port = int(port)
+        if not 0 < port < 65536:
+            raise ValueError("The port is not a valid port number")
 
         self.ip = ip
         self.__port = port
@@ -40,24 +86,57 @@ class Endpoint(metaclass=Unique):
         self.distance = None
         self.found = None
         self.tags = set()
-        cursor = Db.get().cursor()
-        cursor.execute('SELECT id, host, reachable, distance, scope, found FROM endpoints WHERE ip=? AND port=?', (self.ip, self.port))
-        saved_endpoint = cursor.fetchone()
+        saved_endpoint = Db.get().execute(_SELECT_ENDPOINT_BY_IP_PORT, (self.ip, self.port)).fetchone()
         if saved_endpoint is not None:
-            self.id = saved_endpoint[0]
-            self.host = Host.find_one(host_id=saved_endpoint[1])
-            if saved_endpoint[2] is None:
-                self.reachable = None
-            else:
-                self.reachable = saved_endpoint[2] != 0
-            if saved_endpoint[3] is not None:
-                self.distance = saved_endpoint[3]
-            self.scope = saved_endpoint[4] != 0
-            if saved_endpoint[5] is not None:
-                self.found = Endpoint.find_one(endpoint_id=saved_endpoint[5])
-            for row in cursor.execute('SELECT name FROM tags WHERE endpoint=?', (self.id, )):
-                self.tags.add(row[0])
-        cursor.close()
+            self._hydrate(saved_endpoint)
+
+    def _hydrate(self, row):
+        """Fill the Endpoint attributes from a row selected with `_SELECT_ENDPOINTS`
+
+        Args:
+            row (tuple): the (id, ip, port, host, reachable, distance, scope,
+                found, found ip, found port) row
+        """
+
+        self.id = row[0]
+        self.ip = row[1]
+        self.__port = int(row[2])
+        self.host = Host.find_one(host_id=row[3])
+        if row[4] is None:
+            self.reachable = None
+        else:
+            self.reachable = row[4] != 0
+        self.distance = row[5]
+        self.scope = row[6] != 0
+        self.found = None
+        if row[8] is not None:
+            self.__found_address = (row[8], row[9])
+        self.tags = set()
+        for tag_row in Db.get().execute('SELECT name FROM tags WHERE endpoint=?', (self.id, )):
+            self.tags.add(tag_row[0])
+
+    @classmethod
+    def _from_row(cls, row):
+        """Get the stored Endpoint matching a row selected with `_SELECT_ENDPOINTS`
+
+        If the Endpoint isn't in the workspace store yet, it is built from the
+        row instead of being fetched again from the database by `__init__`.
+
+        Args:
+            row (tuple): the row as described in `_hydrate`
+
+        Returns:
+            The matching `Endpoint`
+        """
+
+        from baboossh.workspace import Workspace
+        store = Workspace.active.store[cls.__name__]
+        obj_id = cls.get_id(row[1], row[2])
+        if obj_id not in store:
+            endpoint = cls.__new__(cls)
+            endpoint._hydrate(row)
+            store[obj_id] = endpoint
+        return store[obj_id]
 
     @classmethod
     def get_id(cls, ip, port):
@@ -65,12 +144,30 @@ class Endpoint(metaclass=Unique):
 
     @property
     def port(self):
-        return int(self.__port)
+        return self.__port
 
     @port.setter
     def port(self, port):
         self.__port = int(port)
 
+    @property
+    def found(self):
+        """The Endpoint on which the current Endpoint was discovered
+
+        It is only built when first accessed, from the address joined when
+        the Endpoint was loaded.
+        """
+
+        if self.__found_address is not None:
+            self.__found = Endpoint(*self.__found_address)
+            self.__found_address = None
+        return self.__found
+
+    @found.setter
+    def found(self, found):
+        self.__found = found
+        self.__found_address = None
+
     @property
     def connection(self):
         from baboossh import Connection
@@ -84,31 +181,48 @@ class Endpoint(metaclass=Unique):
 
         """
 
-        cursor = Db.get().cursor()
+        host_id = self.host.id if self.host is not None else None
+        found = self.found
+        found_id = found.id if found is not None else None
+        connection = Db.get()
         if self.id is not None:
             #If we have an ID, the endpoint is already saved in the database : UPDATE
-            cursor.execute('''UPDATE endpoints
-                SET
-                    ip = ?,
-                    port = ?,
-                    host = ?,
-                    reachable = ?,
-                    distance = ?,
-                    scope = ?,
-                    found = ?
-                WHERE id = ?''',
-                           (self.ip, self.port, self.host.id if self.host is not None else None, self.reachable, self.distance, self.scope, self.found.id if self.found is not None else None, self.id))
+            connection.execute(_UPDATE_ENDPOINT,
+                               (self.ip, self.port, host_id, self.reachable, self.distance, self.scope, found_id, self.id))
         else:
             #The endpoint doesn't exists in database : INSERT
-            cursor.execute('''INSERT INTO endpoints(ip, port, host, reachable, distance, scope, found)
-                VALUES (?, ?, ?, ?, ?, ?, ?) ''',
-                           (self.ip, self.port, self.host.id if self.host is not None else None, self.reachable, self.distance, self.scope, self.found.id if self.found is not None else None))
-            cursor.close()
-            cursor = Db.get().cursor()
-            cursor.execute('SELECT id FROM endpoints WHERE ip=? AND port=?', (self.ip, self.port))
-            self.id = cursor.fetchone()[0]
-        cursor.close()
-        Db.get().commit()
+            cursor = connection.execute(_INSERT_ENDPOINT,
+                                        (self.ip, self.port, host_id, self.reachable, self.distance, self.scope, found_id))
+            self.id = cursor.lastrowid
+        connection.commit()
+
+    @classmethod
+    def save_many(cls, endpoints):
+        """Save several Endpoints in database at once
+
+        Endpoints already stored are updated in a single batch, new ones are
+        inserted and get their id set, and the changes are committed once.
+
+        Args:
+            endpoints ([:class:`Endpoint`,...]): the Endpoints to save
+        """
+
+        updates = []
+        inserts = []
+        for endpoint in endpoints:
+            if endpoint.id is not None:
+                updates.append(endpoint)
+            else:
+                inserts.append(endpoint)
+        connection = Db.get()
+        if updates:
+            connection.executemany(_UPDATE_ENDPOINT,
+                                   [(e.ip, e.port, e.host.id if e.host is not None else None, e.reachable, e.distance, e.scope, e.found.id if e.found is not None else None, e.id) for e in updates])
+        for endpoint in inserts:
+            cursor = connection.execute(_INSERT_ENDPOINT,
+                                        (endpoint.ip, endpoint.port, endpoint.host.id if endpoint.host is not None else None, endpoint.reachable, endpoint.distance, endpoint.scope, endpoint.found.id if endpoint.found is not None else None))
+            endpoint.id = cursor.lastrowid
+        connection.commit()
 
     def delete(self):
         """Delete an Endpoint from the :class:`.Workspace`"""
@@ -119,20 +233,24 @@ class Endpoint(metaclass=Unique):
             return {}
         from baboossh.utils import unstore_targets_merge
         del_data = {}
+        connection = Db.get()
         if self.host is not None:
-            endpoints = self.host.endpoints
-            if len(endpoints) == 1:
+            nb_endpoints = connection.execute('SELECT COUNT(*) FROM endpoints WHERE host=?', (self.host.id, )).fetchone()[0]
+            if nb_endpoints == 1:
                 unstore_targets_merge(del_data, self.host.delete())
-        for connection in Connection.find_all(endpoint=self):
-            unstore_targets_merge(del_data, connection.delete())
-        for path in Path.find_all(dst=self):
-            unstore_targets_merge(del_data, path.delete())
-        cursor = Db.get().cursor()
-        cursor.execute('DELETE FROM tags WHERE endpoint = ?', (self.id, ))
-        cursor.execute('DELETE FROM endpoints WHERE id = ?', (self.id, ))
-        cursor.close()
-        Db.get().commit()
-        unstore_targets_merge(del_data, {"Endpoint":[type(self).get_id(self.ip, self.port)]})
+        #Objects are still listed to be removed from the workspace store
+        connections = list(Connection.find_all(endpoint=self))
+        paths = list(Path.find_all(dst=self))
+        connection.execute('DELETE FROM connections WHERE endpoint = ?', (self.id, ))
+        connection.execute('DELETE FROM paths WHERE dst = ?', (self.id, ))
+        connection.execute('DELETE FROM tags WHERE endpoint = ?', (self.id, ))
+        connection.execute('DELETE FROM endpoints WHERE id = ?', (self.id, ))
+        connection.commit()
+        unstore_targets_merge(del_data, {
+            "Connection":[Connection.get_id(conn.endpoint, conn.user, conn.creds) for conn in connections],
+            "Path":[Path.get_id(path.src, path.dst) for path in paths],
+            "Endpoint":[type(self).get_id(self.ip, self.port)],
+            })
         return del_data
 
     @classmethod
@@ -146,24 +264,76 @@ class Endpoint(metaclass=Unique):
                 The `Endpoint` the endpoints were discovered on
 
         Returns:
-            A list of all `Endpoint` s in the :class:`.Workspace`
+            A generator of all `Endpoint` s in the :class:`.Workspace`,
+            built as the results are iterated
         """
 
-        ret = []
-        cursor = Db.get().cursor()
-        if found is None:
-            if scope is None:
-                req = cursor.execute('SELECT ip, port FROM endpoints')
-            else:
-                req = cursor.execute('SELECT ip, port FROM endpoints WHERE scope=?', (scope, ))
-        else:
-            if scope is None:
-                req = cursor.execute('SELECT ip, port FROM endpoints WHERE found=?', (found.id, ))
+        criteria, params = cls.__where(scope, found)
+        for row in Db.get().execute(cls.__query(_SELECT_ENDPOINTS, criteria), params):
+            yield cls._from_row(row)
+
+    @classmethod
+    def count(cls, scope=None, found=None):
+        """Count the Endpoints matching the criteria
+
+        Args:
+            scope (bool):
+                Count Endpoints in scope (`True`), out of scope (`False`), or both (`None`)
+            found (:class:`Endpoint`):
+                The `Endpoint` the endpoints were discovered on
+
+        Returns:
+            The number of matching `Endpoint` s
+        """
+
+        criteria, params = cls.__where(scope, found)
+        return Db.get().execute(cls.__query(_COUNT_ENDPOINTS, criteria), params).fetchone()[0]
+
+    @classmethod
+    def __where(cls, scope, found):
+        """Build the conditions matching the `find_all` criteria
+
+        Args:
+            scope (bool): the scope criterion, ignored if `None`
+            found (:class:`Endpoint`): the found criterion, ignored if `None`
+
+        Returns:
+            A (conditions, parameters) tuple. Columns are prefixed with the `e`
+            table alias.
+        """
+
+        where = ()
+        params = []
+        if scope is not None:
+            where = where + ('e.scope=?', )
+            params.append(scope)
+        if found is not None:
+            where = where + ('e.found=?', )
+            params.append(found.id)
+        return where, params
+
+    @classmethod
+    def __query(cls, base, criteria):
+        """Get a query filtered on some conditions
+
+        The query is only formatted the first time, so the same string is
+        passed to sqlite afterwards.
+
+        Args:
+            base (str): the query to filter
+            criteria (tuple): the SQL conditions to join with AND
+
+        Returns:
+            The filtered query
+        """
+
+        key = (base, criteria)
+        if key not in cls.__queries:
+            if criteria:
+                cls.__queries[key] = base+' WHERE '+' AND '.join(criteria)
             else:
-                req = cursor.execute('SELECT ip, port FROM endpoints WHERE scope=? and found=?', (scope, found.id))
-        for row in req:
-            ret.append(Endpoint(row[0], row[1]))
-        return ret
+                cls.__queries[key] = base
+        return cls.__queries[key]
 
     @classmethod
     def find_one(cls, endpoint_id=None, ip_port=None):
@@ -177,43 +347,36 @@ class Endpoint(metaclass=Unique):
             A single `Endpoint` or `None`.
         """
 
-        cursor = Db.get().cursor()
-
         if endpoint_id is not None:
             if endpoint_id == 0:
-                cursor.close()
                 return None
-            cursor.execute('''SELECT ip, port FROM endpoints WHERE id=?''', (endpoint_id, ))
+            req = Db.get().execute(_SELECT_ENDPOINT_BY_ID, (endpoint_id, ))
         elif ip_port is not None:
             ip, sep, port = ip_port.partition(":")
             if port == "":
                 raise ValueError
-            cursor.execute('''SELECT ip, port FROM endpoints WHERE ip=? and port=?''', (ip, port))
+            req = Db.get().execute(_SELECT_ENDPOINT_BY_IP_PORT, (ip, port))
         else:
-            cursor.close()
             return None
 
-        row = cursor.fetchone()
-        cursor.close()
+        row = req.fetchone()
         if row is None:
             return None
-        return Endpoint(row[0], row[1])
+        return cls._from_row(row)
     
     def tag(self, tagname):
-        cursor = Db.get().cursor()
+        connection = Db.get()
         try:
-            cursor.execute('''INSERT INTO tags (name, endpoint) VALUES (?, ?)''', (tagname, self.id))
+            connection.execute('''INSERT INTO tags (name, endpoint) VALUES (?, ?)''', (tagname, self.id))
         except sqlite3.IntegrityError:
             pass
-        cursor.close()
-        Db.get().commit()
+        connection.commit()
         self.tags.add(tagname)
 
     def untag(self, tagname):
-        cursor = Db.get().cursor()
-        cursor.execute('DELETE FROM tags WHERE name = ? and endpoint = ?', (tagname, self.id))
-        cursor.close()
-        Db.get().commit()
+        connection = Db.get()
+        connection.execute('DELETE FROM tags WHERE name = ? and endpoint = ?', (tagname, self.id))
+        connection.commit()
         try:
             self.tags.remove(tagname)
         except KeyError:
@@ -221,31 +384,38 @@ class Endpoint(metaclass=Unique):
 
 
     def __str__(self):
-        return self.ip+":"+str(self.port)
+        return self.ip+":"+str(self.__port)
 
     @classmethod
-    def search(cls, field, val, show_all=False):
+    def search(cls, field, val, show_all=False, exact=False):
         """Search in the workspace for an `Endpoint`
 
         Args:
             field (str): the `Endpoint` attribute to search in
             val (str): the value to search for
             show_all (bool): whether to include out-of scope `Endpoint` s in search results
+            exact (bool): whether the field must be equal to `val` instead of
+                containing it. This allows the lookup to use the indexes.
 
         Returns:
-            A `List` of `Endpoint` s corresponding to the search.
+            A generator of the `Endpoint` s corresponding to the search, built
+            as the results are iterated
         """
 
         if field not in cls.search_fields:
             raise ValueError
-        ret = []
-        cursor = Db.get().cursor()
-        val = "%"+val+"%"
-        if show_all:
+        key = (field, show_all, exact)
+        if key not in cls.__search_queries:
             #Ok this sounds fugly, but there seems to be no way to set a column name in a parameter. The SQL injection risk is mitigated as field must be in allowed fields, but if you find something better I take it
-            cursor.execute('SELECT ip, port FROM endpoints WHERE {} LIKE ?'.format(field), (val, ))
+            criteria = ('e.{} {} ?'.format(field, "=" if exact else "LIKE"), )
+            if not show_all:
+                criteria = ('e.scope=?', ) + criteria
+            cls.__search_queries[key] = cls.__query(_SELECT_ENDPOINTS, criteria)
+        if not exact:
+            val = "%"+val+"%"
+        if show_all:
+            params = (val, )
         else:
-            cursor.execute('SELECT ip, port FROM endpoints WHERE scope=? and {} LIKE ?'.format(field), (True, val))
-        for row in cursor:
-            ret.append(Endpoint(row[0], row[1]))
-        return ret
+            params = (True, val)
+        for row in Db.get().execute(cls.__search_queries[key], params):
+            yield cls._from_row(row)
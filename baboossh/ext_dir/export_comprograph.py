@@ -33,17 +33,17 @@ class BaboosshExt(object,metaclass=ExtStr):
             if endpoint.host is not None:
                 label = label + '<tr><td>'+str(endpoint.host)+'</td></tr>'
             if findings:
-                foundEndpoints = Endpoint.find_all(found=endpoint,scope=True)
+                nbFoundEndpoints = Endpoint.count(found=endpoint,scope=True)
                 foundUsers = User.find_all(found=endpoint,scope=True)
                 foundCreds = Creds.find_all(found=endpoint,scope=True)
 
-                if foundEndpoints or foundUsers or foundCreds:
+                if nbFoundEndpoints or foundUsers or foundCreds:
                     label = label + "<tr><td><table cellborder='1' cellspacing='0'><tr><td colspan='2'>Findings</td></tr>"
 
-                    if foundEndpoints :
+                    if nbFoundEndpoints :
                         label = label + '<tr><td>Endpoints</td><td>'
                         first = True
-                        for foundEndpoint in foundEndpoints:
+                        for foundEndpoint in Endpoint.find_all(found=endpoint,scope=True):
                             if not first:
                                 label = label + '<br />'
                             else:
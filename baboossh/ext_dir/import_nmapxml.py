@@ -59,20 +59,25 @@ class BaboosshExt(object,metaclass=ExtStr):
             return False
         count = 0
         count_new = 0
+        new_endpoints = {}
         for host in report.hosts:
             for s in host.services:
                 if s.service == "ssh" and s.open():
                     count = count + 1
                     new_endpoint = Endpoint(host.address,s.port)
+                    if str(new_endpoint) in new_endpoints:
+                        continue
                     if new_endpoint.id is None:
                         count_new = count_new + 1
-                    new_endpoint.save()
                     if distance is not None:
                         if new_endpoint.distance is None or new_endpoint.distance > distance:
                             new_endpoint.distance = distance
-                            new_endpoint.save()
-                        new_path = Path(src,new_endpoint)
-                        new_path.save()
+                    new_endpoints[str(new_endpoint)] = new_endpoint
+        Endpoint.save_many(new_endpoints.values())
+        if distance is not None:
+            for new_endpoint in new_endpoints.values():
+                new_path = Path(src,new_endpoint)
+                new_path.save()
         print(str(count)+" endpoints found, "+str(count_new)+" new endpoints saved")
         return True
  
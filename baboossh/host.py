@@ -66,7 +66,42 @@ class Host(metaclass=Unique):
 
     @classmethod
     def get_id(cls, hostname, uname, issue, machine_id, macs):
-        return hashlib.sha256((hostname+uname+issue+machine_id+json.dumps(macs)).encode()).hexdigest()
+        return cls.__get_id_serialized(hostname, uname, issue, machine_id, json.dumps(macs))
+
+    @classmethod
+    def __get_id_serialized(cls, hostname, uname, issue, machine_id, macs_json):
+        return hashlib.sha256((hostname+uname+issue+machine_id+macs_json).encode()).hexdigest()
+
+    @classmethod
+    def _from_row(cls, row):
+        """Get the stored Host matching a full `hosts` row
+
+        The `macs` column is already serialized, so it is used as is to
+        compute the store key and only decoded once when the Host isn't in
+        the workspace store yet, instead of being dumped again by
+        `get_id` and `__init__`.
+
+        Args:
+            row (tuple): the (id, name, hostname, uname, issue, machine_id, macs) row
+
+        Returns:
+            The matching `Host`
+        """
+
+        from baboossh.workspace import Workspace
+        store = Workspace.active.store[cls.__name__]
+        obj_id = cls.__get_id_serialized(row[2], row[3], row[4], row[5], row[6])
+        if obj_id not in store:
+            host = cls.__new__(cls)
+            host.id = row[0]
+            host.name = row[1]
+            host.hostname = row[2]
+            host.uname = row[3]
+            host.issue = row[4]
+            host.machine_id = row[5]
+            host.macs = json.loads(row[6])
+            store[obj_id] = host
+        return store[obj_id]
 
     @property
     def scope(self):
@@ -82,9 +117,11 @@ class Host(metaclass=Unique):
 
     @scope.setter
     def scope(self, scope):
-        for endpoint in self.endpoints:
+        from baboossh import Endpoint
+        endpoints = self.endpoints
+        for endpoint in endpoints:
             endpoint.scope = scope
-            endpoint.save()
+        Endpoint.save_many(endpoints)
 
     @property
     def distance(self):
@@ -158,9 +195,11 @@ class Host(metaclass=Unique):
         del_data = {}
         for path in Path.find_all(src=self):
             unstore_targets_merge(del_data, path.delete())
-        for endpoint in self.endpoints:
+        from baboossh import Endpoint
+        endpoints = self.endpoints
+        for endpoint in endpoints:
             endpoint.host = None
-            endpoint.save()
+        Endpoint.save_many(endpoints)
         cursor = Db.get().cursor()
         cursor.execute('DELETE FROM hosts WHERE id = ?', (self.id, ))
         cursor.close()
@@ -184,10 +223,10 @@ class Host(metaclass=Unique):
         ret = []
         cursor = Db.get().cursor()
 
-        req = cursor.execute('SELECT hostname, uname, issue, machine_id, macs FROM hosts')
+        req = cursor.execute('SELECT id, name, hostname, uname, issue, machine_id, macs FROM hosts')
 
-        for row in req:
-            host = Host(row[0], row[1], row[2], row[3], json.loads(row[4]))
+        for row in req.fetchall():
+            host = cls._from_row(row)
             if scope is None:
                 ret.append(host)
             elif host.scope == scope:
@@ -230,9 +269,9 @@ class Host(metaclass=Unique):
 
         cursor = Db.get().cursor()
         if host_id is not None:
-            cursor.execute('''SELECT hostname, uname, issue, machine_id, macs FROM hosts WHERE id=?''', (host_id, ))
+            cursor.execute('''SELECT id, name, hostname, uname, issue, machine_id, macs FROM hosts WHERE id=?''', (host_id, ))
         elif name is not None:
-            cursor.execute('''SELECT hostname, uname, issue, machine_id, macs FROM hosts WHERE name=?''', (name, ))
+            cursor.execute('''SELECT id, name, hostname, uname, issue, machine_id, macs FROM hosts WHERE name=?''', (name, ))
         else:
             cursor.close()
             return None
@@ -241,7 +280,7 @@ class Host(metaclass=Unique):
         cursor.close()
         if row is None:
             return None
-        return Host(row[0], row[1], row[2], row[3], json.loads(row[4]))
+        return cls._from_row(row)
 
     @classmethod
     def search(cls, field, val, show_all=False):
@@ -262,8 +301,9 @@ class Host(metaclass=Unique):
         cursor = Db.get().cursor()
         val = "%"+val+"%"
         #Ok this sounds fugly, but there seems to be no way to set a column name in a parameter. The SQL injection risk is mitigated as field must be in allowed fields, but if you find something better I take it
-        for row in cursor.execute('SELECT hostname, uname, issue, machine_id, macs FROM hosts WHERE {} LIKE ?'.format(field), (val, )):
-            ret.append(Host(row[0], row[1], row[2], row[3], json.loads(row[4])))
+        for row in cursor.execute('SELECT id, name, hostname, uname, issue, machine_id, macs FROM hosts WHERE {} LIKE ?'.format(field), (val, )).fetchall():
+            ret.append(cls._from_row(row))
+        cursor.close()
         if not show_all:
             ret = [host for host in ret if host.scope]
         return ret
@@ -411,7 +411,8 @@ class Shell(cmd2.Cmd):
             print("Invalid field specified, use one of "+str(allowed_fields)+".")
             return
         val = vars(stmt)['val']
-        endpoints = self.workspace.endpoint_search(field, val, show_all, add_tag=tag)
+        exact = getattr(stmt, 'exact', False)
+        endpoints = self.workspace.endpoint_search(field, val, show_all, add_tag=tag, exact=exact)
         print("Search result for endpoints:")
         if not endpoints:
             print("No results")
@@ -430,6 +431,7 @@ class Shell(cmd2.Cmd):
     __parser_endpoint_add.add_argument('port', help='New endpoint port', type=int, default=22, nargs='?')
     __parser_endpoint_search = __subparser_endpoint.add_parser("search", help='Search an endpoint')
     __parser_endpoint_search.add_argument("-a", "--all", help="Include out of scope elements in search", action="store_true")
+    __parser_endpoint_search.add_argument("-e", "--exact", help="Match the whole field value", action="store_true")
     __parser_endpoint_search.add_argument('field', help='Field to search in', choices_provider=__get_search_fields_endpoint)
     __parser_endpoint_search.add_argument('val', help='Value to search')
     __parser_endpoint_search.add_argument("-t", "--tag", help="Add tag to search results", choices_provider=__get_tag)
@@ -890,6 +892,7 @@ class Shell(cmd2.Cmd):
     __parser_probe.add_argument("-a", "--again", help="include already probed endpoints", action="store_true")
     __parser_probe.add_argument("-n", "--new", help="try finding new shorter path", action="store_true")
     __parser_probe.add_argument("-g", "--gateway", help="force specific gateway", choices_provider=__get_option_gateway)
+    __parser_probe.add_argument("-j", "--jobs", help="number of endpoints probed at the same time", type=int, default=1)
     __parser_probe.add_argument('target', help='Endpoint to probe', nargs="?", choices_provider=__get_option_endpoint_tag)
 
     @cmd2.with_argparser(__parser_probe)
@@ -903,6 +906,7 @@ class Shell(cmd2.Cmd):
         gateway = getattr(stmt, 'gateway', "auto")
         if gateway is None:
             gateway = "auto"
+        jobs = getattr(stmt, 'jobs', 1)
 
         if new and gateway != "auto":
             print("Error: You cannot use both --new and --gateway options.")
@@ -914,7 +918,7 @@ class Shell(cmd2.Cmd):
             if not yes_no("This will probe "+str(nb_targets)+" endpoints. Proceed ?", False, list_val=targets):
                 return
 
-        self.workspace.probe(targets, gateway, verbose, find_new=new)
+        self.workspace.probe(targets, gateway, verbose, find_new=new, concurrency=jobs)
 
 #################################################################
 ###################          CONNECT          ###################
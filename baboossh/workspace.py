@@ -1,5 +1,7 @@
 import os
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from baboossh import User, Creds, Host, Endpoint, Tunnel
 from baboossh import Path, Connection, Db, Extensions, WORKSPACES_DIR, Tag
 from baboossh.exceptions import NoPathError, WorkspaceVersionError, ConnectionClosedError
@@ -436,7 +438,7 @@ class Workspace():
     def enum_probe(self, target=None, again=False):
         if target is not None:
             if target == "*":
-                endpoints = Endpoint.find_all(scope=True)
+                endpoints = list(Endpoint.find_all(scope=True))
             elif target[0] == "!":
                 tag = Tag(target[1:])
                 endpoints = tag.endpoints
@@ -450,7 +452,7 @@ class Workspace():
                 return self.options["endpoint"].endpoints
             return [self.options["endpoint"]]
         else:
-            endpoints = Endpoint.find_all(scope=True)
+            endpoints = list(Endpoint.find_all(scope=True))
 
         if not again:
             endpoints = [endpoint for endpoint in endpoints if not endpoint.reachable]
@@ -469,7 +471,7 @@ class Workspace():
 
             auth, sep, endpoint = target.partition('@')
             if endpoint == "*":
-                endpoints = Endpoint.find_all(scope=True)
+                endpoints = list(Endpoint.find_all(scope=True))
             elif endpoint[0] == "!":
                 tag = Tag(endpoint[1:])
                 endpoints = tag.endpoints
@@ -510,7 +512,7 @@ class Workspace():
             if isinstance(endpoint, Tag):
                 endpoints = endpoint.endpoints
             elif endpoint is None:
-                endpoints = Endpoint.find_all(scope=True)
+                endpoints = list(Endpoint.find_all(scope=True))
             else:
                 endpoints = [endpoint]
             cred = self.options["creds"]
@@ -726,74 +728,186 @@ class Workspace():
 ###################           PROBE           ###################
 #################################################################
 
-    def probe(self, targets, gateway="auto", verbose=False, find_new=False):
-        for endpoint in targets:
-            print("Probing \033[1;34m"+str(endpoint)+"\033[0m > ", end="", flush=True)
-            if verbose:
-                print("")
+    def probe(self, targets, gateway="auto", verbose=False, find_new=False, concurrency=1):
+        """Try to reach :class:`Endpoint` s, using existing paths or finding new ones
 
-            conn = Connection(endpoint, None, None)
-            working = False
-            if not find_new and endpoint.reachable and str(gateway) == "auto":
-                if verbose:
-                    print("\nEndpoint is supposed to be reachable, trying...")
-                working = conn.probe(verbose=verbose)
-                host = Host.find_one(prev_hop_to=endpoint)
-            if not working and str(gateway) != "auto":
+        Args:
+            targets ([:class:`Endpoint`]): the Endpoints to probe
+            gateway (str): `"auto"` to find the gateway to use, `"local"` or a
+                :class:`Host` name to force it
+            verbose (bool): whether to print every attempt
+            find_new (bool): whether to look for a new shorter path
+            concurrency (int): the number of Endpoints probed at the same time.
+                Each result is printed as a single line once it is known.
+        """
+
+        batch = {
+            "gateways": None,
+            "gateways_by_host": {},
+            "lock": threading.Lock(),
+            }
+        if concurrency <= 1:
+            for endpoint in targets:
+                print("Probing \033[1;34m"+str(endpoint)+"\033[0m > ", end="", flush=True)
                 if verbose:
-                    print("\nA gateway was given, trying...")
-                if gateway == "local":
-                    gateway_conn = None
-                    host = None
-                else:
-                    host = Host.find_one(name=gateway)
-                    gateway_conn = Connection.find_one(endpoint=host.closest_endpoint)
+                    print("")
                 try:
-                    working = conn.probe(gateway=gateway_conn, verbose=verbose)
+                    result = self.__probe_endpoint(endpoint, gateway, verbose, find_new, batch)
                 except ConnectionClosedError as exc:
                     print("\nError: "+str(exc))
                     return
-            if not working and not find_new:
-                try:
-                    Path.get(endpoint)
-                except NoPathError:
-                    pass
-                else:
-                    if verbose:
-                        print("\nThere is an existing path to the Endpoint, trying...")
-                    working = conn.probe(verbose=verbose)
-                    host = Host.find_one(prev_hop_to=endpoint)
-                    if not working and host is not None:
-                        self.path_del(host, endpoint)
-            if not working:
+                print(result)
                 if verbose:
-                    print("\nTrying to reach directly from local...")
+                    print("########################\n")
+            return
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {executor.submit(self.__probe_endpoint_thread, endpoint, gateway, verbose, find_new, batch): endpoint for endpoint in targets}
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except ConnectionClosedError as exc:
+                    print("Error: "+str(exc))
+                    for pending in futures:
+                        pending.cancel()
+                    return
+                print("Probing \033[1;34m"+str(futures[future])+"\033[0m > "+result)
+
+    def __probe_endpoint_thread(self, *args):
+        """Run `__probe_endpoint` from a worker thread
+
+        The thread's database connection is closed once the probe is done.
+        """
+
+        try:
+            return self.__probe_endpoint(*args)
+        finally:
+            Db.close()
+
+    def __probe_endpoint(self, endpoint, gateway, verbose, find_new, batch):
+        """Try to reach an :class:`Endpoint` and save the path found to it
+
+        Args:
+            endpoint (:class:`Endpoint`): the Endpoint to probe
+            gateway (str): see `probe`
+            verbose (bool): see `probe`
+            find_new (bool): see `probe`
+            batch (dict): the state shared by the probes of a batch
+
+        Returns:
+            The result message
+
+        Raises:
+            ConnectionClosedError: if the forced gateway could not be opened
+        """
+
+        conn = Connection(endpoint, None, None)
+        working = False
+        if not find_new and endpoint.reachable and str(gateway) == "auto":
+            if verbose:
+                print("\nEndpoint is supposed to be reachable, trying...")
+            host, gateway_conn = self.__probe_gateway_to(endpoint, batch["gateways_by_host"])
+            working = conn.probe(gateway=gateway_conn, verbose=verbose)
+        if not working and str(gateway) != "auto":
+            if verbose:
+                print("\nA gateway was given, trying...")
+            if gateway == "local":
+                gateway_conn = None
                 host = None
-                working = conn.probe(gateway=None, verbose=verbose)
-            if not working:
-                if verbose:
-                    print("\nTrying from every Host from closest to furthest...")
-                hosts = Host.find_all(scope=True)
-                hosts.sort(key=lambda h: h.distance)
-                working = False
-                for host in hosts:
-                    gateway_endpoint = host.closest_endpoint
-                    loop_gateway = Connection.find_one(endpoint=gateway_endpoint)
-                    working = conn.probe(gateway=loop_gateway, verbose=verbose)
-                    if working:
-                        break
-
-            if working:
-                path = Path(host, endpoint)
-                path.save()
-                if host is None:
-                    print("\033[1;32mOK\033[0m: reached directly from \033[1;34mlocal\033[0m.")
-                else:
-                    print("\033[1;32mOK\033[0m: reached using \033[1;34m"+str(host)+"\033[0m as gateway")
             else:
-                print("\033[1;31mKO\033[0m: could not reach the endpoint.")
+                host = Host.find_one(name=gateway)
+                gateway_conn = Connection.find_one(endpoint=host.closest_endpoint)
+            working = conn.probe(gateway=gateway_conn, verbose=verbose)
+        if not working and not find_new:
+            try:
+                Path.get(endpoint)
+            except NoPathError:
+                pass
+            else:
+                if verbose:
+                    print("\nThere is an existing path to the Endpoint, trying...")
+                host, gateway_conn = self.__probe_gateway_to(endpoint, batch["gateways_by_host"])
+                working = conn.probe(gateway=gateway_conn, verbose=verbose)
+                if not working and host is not None:
+                    self.path_del(host, endpoint)
+        if not working:
+            if verbose:
+                print("\nTrying to reach directly from local...")
+            host = None
+            working = conn.probe(gateway=None, verbose=verbose)
+        if not working:
             if verbose:
-                print("########################\n")
+                print("\nTrying from every Host from closest to furthest...")
+            with batch["lock"]:
+                if batch["gateways"] is None:
+                    batch["gateways"] = self.__probe_gateways()
+                gateways = list(batch["gateways"])
+            working = False
+            for host, loop_gateway in gateways:
+                try:
+                    working = conn.probe(gateway=loop_gateway, verbose=verbose)
+                except ConnectionClosedError:
+                    #The gateway is down, don't try it again for the next targets
+                    with batch["lock"]:
+                        if (host, loop_gateway) in batch["gateways"]:
+                            batch["gateways"].remove((host, loop_gateway))
+                    continue
+                if working:
+                    break
+
+        if not working:
+            return "\033[1;31mKO\033[0m: could not reach the endpoint."
+        path = Path(host, endpoint)
+        path.save()
+        if host is None:
+            return "\033[1;32mOK\033[0m: reached directly from \033[1;34mlocal\033[0m."
+        return "\033[1;32mOK\033[0m: reached using \033[1;34m"+str(host)+"\033[0m as gateway"
+
+    def __probe_gateway_to(self, endpoint, gateways_by_host):
+        """Find the previous hop and the gateway to reach an Endpoint
+
+        This resolves the gateway like `Connection.find_one(gateway_to=endpoint)`,
+        but the gateway :class:`Connection` of each :class:`Host` is memoized in
+        `gateways_by_host` so that targets behind the same Host only look it up
+        once per probe batch.
+
+        Args:
+            endpoint (:class:`Endpoint`): the Endpoint to reach
+            gateways_by_host (dict): the gateway Connections by Host id
+
+        Returns:
+            A (:class:`Host`, :class:`Connection`) tuple, the Connection being
+            `None` if the Endpoint should be reached directly
+
+        Raises:
+            NoPathError: if no path could be found to `endpoint`
+        """
+
+        host = Host.find_one(prev_hop_to=endpoint)
+        if host is None or endpoint.distance == 0:
+            return host, None
+        if host.id not in gateways_by_host:
+            gateways_by_host[host.id] = Connection.find_one(endpoint=host.closest_endpoint, scope=True)
+        return host, gateways_by_host[host.id]
+
+    def __probe_gateways(self):
+        """List the gateways to try when probing, closest first
+
+        The list is built once per probe batch so that the gateways' open
+        :class:`Connection` s are shared by every probed target.
+
+        Returns:
+            A `List` of (:class:`Host`, :class:`Connection`) tuples
+        """
+
+        hosts = Host.find_all(scope=True)
+        hosts.sort(key=lambda h: h.distance)
+        gateways = []
+        for host in hosts:
+            connection = Connection.find_one(endpoint=host.closest_endpoint)
+            if connection is not None:
+                gateways.append((host, connection))
+        return gateways
 
 #################################################################
 ###################           SCOPE           ###################
@@ -869,7 +983,7 @@ class Workspace():
         if connections:
             ret = ret + Connection.find_all(scope=scope)
         if endpoints:
-            ret = ret + Endpoint.find_all(scope=scope)
+            ret = ret + list(Endpoint.find_all(scope=scope))
         if users:
             ret = ret + User.find_all(scope=scope)
         if creds:
@@ -882,8 +996,8 @@ class Workspace():
             ret = ret + Tag.find_all()
         return ret
 
-    def endpoint_search(self, field, val, show_all=False, add_tag=None):
-        endpoints = Endpoint.search(field, val, show_all)
+    def endpoint_search(self, field, val, show_all=False, add_tag=None, exact=False):
+        endpoints = list(Endpoint.search(field, val, show_all, exact=exact))
         if add_tag is not None:
             for endpoint in endpoints:
                 endpoint.tag(add_tag)